@@ -5,33 +5,69 @@ Built with Streamlit, classical NLP, and template-based generation.
 """
 
 import streamlit as st
-import PyPDF2
 import re
+import html
+import hashlib
 import json
 import zipfile
+from io import BytesIO
 from datetime import datetime
-from fpdf import FPDF
+from array import array
 from collections import Counter
+from functools import lru_cache
 import math
 
-try:
-    from docx import Document
-    from docx.shared import Pt
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-    HAS_DOCX = True
-except ImportError:
-    HAS_DOCX = False
+# PDF/DOCX libraries are imported inside the functions that use them so the
+# first page renders without loading them. Optional ones go through a cached
+# loader that really imports them: a package can be installed yet fail to
+# import (e.g. python-docx without lxml), and then the feature is unavailable
+@lru_cache(maxsize=None)
+def _load_docx():
+    """Import python-docx on first use; return None if it is missing or broken"""
+    try:
+        import docx
+        import docx.enum.text
+    except (ImportError, OSError):
+        return None
+    return docx
 
-try:
-    from bs4 import BeautifulSoup
-except ImportError:
-    BeautifulSoup = None
 
-try:
-    import weasyprint
-    HAS_WEASYPRINT = True
-except ImportError:
-    HAS_WEASYPRINT = False
+@lru_cache(maxsize=None)
+def _load_pdfium():
+    """Import pypdfium2 on first use; return None if it is missing or its native library fails to load"""
+    try:
+        import pypdfium2
+    except (ImportError, OSError):
+        return None
+    return pypdfium2
+
+# Precompiled patterns shared by the text utilities below
+_WORD_RE = re.compile(r'\b[a-z]+(?:[_-][a-z]+)*\b')
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+_SENT_SPLIT_RE = re.compile(r'[.!?]\s+')
+# Plain letter runs, so hyphenated verbs such as "co-led" still expose "led"
+_LETTERS_RE = re.compile(r'[a-z]+')
+
+# Text-based resume pages carry hundreds of characters; scanned pages extract almost none
+_MIN_CHARS_PER_PAGE = 50
+
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were', 'be', 'have',
+    'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
+    'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those', 'i',
+    'you', 'he', 'she', 'it', 'we', 'they', 'what', 'which', 'who', 'when',
+    'where', 'why', 'how', 'all', 'each', 'every', 'both', 'few', 'more',
+    'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'same',
+    'so', 'than', 'too', 'very', 'as', 'if', 'just', 'about', 'into'
+})
+
+# Action verbs that mark a sentence as a candidate STAR bullet
+_ACTION_VERBS = frozenset({
+    'developed', 'implemented', 'designed', 'created', 'managed', 'led',
+    'improved', 'optimized', 'achieved', 'increased', 'reduced', 'delivered'
+})
 
 
 # ======================================================
@@ -39,87 +75,127 @@ except ImportError:
 # ======================================================
 def sanitize_html_text(html_content: str) -> str:
     """Extract and sanitize text from HTML"""
-    text = re.sub(r'<[^>]+>', '', html_content)
-    text = text.replace('&nbsp;', ' ').replace('&amp;', '&').replace('&lt;', '<')
-    text = text.replace('&gt;', '>').replace('&quot;', '"')
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    text = html.unescape(_TAG_RE.sub('', html_content))
+    return _WS_RE.sub(' ', text).strip()
 
 
 
-def extract_text_from_pdf(uploaded_file) -> str:
-    reader = PyPDF2.PdfReader(uploaded_file)
-    text = ""
+@st.cache_data(show_spinner=False, max_entries=32)
+def extract_text_from_pdf(pdf_data: bytes) -> tuple:
+    """Extract plain text from every page of PDF bytes and return (text, page_count)"""
+    pdfium = _load_pdfium()
+    if pdfium is not None:
+        # PDFium's C++ text extraction is much faster than PyPDF2's parser,
+        # and it parses the in-memory bytes without a file object in between
+        pdf = pdfium.PdfDocument(pdf_data)
+        page_count = len(pdf)
+        parts = []
+        try:
+            for page in pdf:
+                textpage = page.get_textpage()
+                page_text = textpage.get_text_bounded()
+                textpage.close()
+                page.close()
+                if page_text:
+                    parts.append(page_text.replace('\r\n', '\n'))
+        finally:
+            pdf.close()
+        return "\n".join(parts).strip(), page_count
+
+    import PyPDF2
+    
+    reader = PyPDF2.PdfReader(BytesIO(pdf_data))
+    parts = []
     for page in reader.pages:
         page_text = page.extract_text()
         if page_text:
-            text += page_text + "\n"
-    return text.strip()
+            parts.append(page_text)
+    return "\n".join(parts).strip(), len(reader.pages)
+
+
+def is_image_only_pdf(text: str, page_count: int) -> bool:
+    """Return True when a PDF yields too little text per page to be anything but scanned images"""
+    return len(text) < _MIN_CHARS_PER_PAGE * max(1, page_count)
 
 
 # ======================================================
 # Pure Python TF-IDF Implementation (No scikit-learn)
 # ======================================================
-def tokenize(text: str) -> list:
-    """Tokenize text into words"""
-    text = text.lower()
-    words = re.findall(r'\b[a-z]+(?:[_-][a-z]+)*\b', text)
-    stop_words = {
-        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-        'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were', 'be', 'have',
-        'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
-        'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those', 'i',
-        'you', 'he', 'she', 'it', 'we', 'they', 'what', 'which', 'who', 'when',
-        'where', 'why', 'how', 'all', 'each', 'every', 'both', 'few', 'more',
-        'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'same',
-        'so', 'than', 'too', 'very', 'as', 'if', 'just', 'about', 'into'
-    }
-    return [w for w in words if w not in stop_words and len(w) > 2]
+# Memoized: a single run tokenizes the same resume and job description from several functions
+@lru_cache(maxsize=8)
+def tokenize(text: str, lowercase: bool = True) -> tuple:
+    """Tokenize text into words; pass lowercase=False for text that is already lowercased"""
+    if lowercase:
+        text = text.lower()
+    words = _WORD_RE.findall(text)
+    return tuple(w for w in words if w not in _STOP_WORDS and len(w) > 2)
 
 
 def extract_ngrams(words: list, n: int = 2) -> list:
     """Extract n-grams from word list"""
-    ngrams = []
-    for i in range(len(words) - n + 1):
-        ngrams.append(' '.join(words[i:i+n]))
-    return ngrams
+    # Zip n shifted views instead of slicing a new list at every position
+    return [' '.join(gram) for gram in zip(*(words[i:] for i in range(n)))]
 
 
-def calculate_tfidf(documents: list) -> dict:
-    """Calculate TF-IDF for documents"""
-    all_words = []
+def calculate_tfidf(documents: list) -> tuple:
+    """
+    Calculate TF-IDF for documents as a sparse matrix in coordinate (COO) form
+
+    Args:
+        documents: List of document texts
+
+    Returns:
+        (vocabulary, doc_ids, term_ids, scores) where vocabulary maps each word to
+        its term id and the three parallel arrays hold one entry per retained score
+    """
     doc_tokens = []
-    
+    doc_freq = Counter()
+
+    # Tokenize once and count each word at most once per document
     for doc in documents:
         tokens = tokenize(doc)
         doc_tokens.append(tokens)
-        all_words.extend(tokens)
-    
-    idf = {}
-    total_docs = len(documents)
-    
+        doc_freq.update(set(tokens))
+
     # Calculate IDF
-    for word in set(all_words):
-        docs_with_word = sum(1 for tokens in doc_tokens if word in tokens)
-        idf[word] = math.log(total_docs / (docs_with_word + 1))
-    
-    # Calculate TF-IDF
-    tfidf_scores = {}
+    total_docs = len(documents)
+    idf = {word: math.log(total_docs / (docs_with_word + 1))
+           for word, docs_with_word in doc_freq.items()}
+
+    # Calculate TF-IDF into parallel typed arrays rather than per-word lists of tuples
+    vocabulary = {}
+    doc_ids = array('i')
+    term_ids = array('i')
+    scores = array('d')
     for i, tokens in enumerate(doc_tokens):
-        tf = Counter(tokens)
-        for word, count in tf.items():
-            tfidf = (count / len(tokens)) * idf.get(word, 0) if tokens else 0
+        if not tokens:
+            continue
+        doc_len = len(tokens)
+        for word, count in Counter(tokens).items():
+            tfidf = (count / doc_len) * idf[word]
             if tfidf > 0.01:
-                if word not in tfidf_scores:
-                    tfidf_scores[word] = []
-                tfidf_scores[word].append((i, tfidf))
-    
-    return tfidf_scores
+                doc_ids.append(i)
+                term_ids.append(vocabulary.setdefault(word, len(vocabulary)))
+                scores.append(tfidf)
+
+    return vocabulary, doc_ids, term_ids, scores
 
 
 # ======================================================
 # ATS Keyword Extraction (Pure Python)
 # ======================================================
+# Common ATS keywords to look for
+_COMMON_KEYWORDS = (
+    'python', 'java', 'javascript', 'sql', 'machine learning', 'data science',
+    'cloud', 'aws', 'azure', 'docker', 'kubernetes', 'agile', 'scrum',
+    'project management', 'leadership', 'communication', 'analytics',
+    'deep learning', 'neural networks', 'nlp', 'computer vision',
+    'tensorflow', 'pytorch', 'pandas', 'numpy',
+    'git', 'github', 'cicd', 'rest api', 'microservices', 'api', 'database'
+)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
 def extract_keywords(job_description: str) -> list:
     """
     Extract ATS keywords from job description using Pure Python TF-IDF
@@ -132,42 +208,30 @@ def extract_keywords(job_description: str) -> list:
     """
     if not job_description:
         return []
-    
-    # Common ATS keywords to look for
-    common_keywords = [
-        'python', 'java', 'javascript', 'sql', 'machine learning', 'data science',
-        'cloud', 'aws', 'azure', 'docker', 'kubernetes', 'agile', 'scrum',
-        'project management', 'leadership', 'communication', 'analytics',
-        'deep learning', 'neural networks', 'nlp', 'computer vision',
-        'tensorflow', 'pytorch', 'pandas', 'numpy',
-        'git', 'github', 'cicd', 'rest api', 'microservices', 'api', 'database'
-    ]
-    
+
+    jd_lower = job_description.lower()
     try:
         # Tokenize job description
-        tokens = tokenize(job_description)
+        tokens = tokenize(jd_lower, lowercase=False)
         
         # Extract 1-grams and 2-grams
         unigrams = tokens
         bigrams = extract_ngrams(tokens, 2)
-        all_terms = unigrams + bigrams
+        all_terms = [*unigrams, *bigrams]
         
         # Get TF scores (frequency-based since we only have one doc)
         term_freq = Counter(all_terms)
-        sorted_terms = sorted(term_freq.items(), key=lambda x: x[1], reverse=True)
-        extracted = [term for term, count in sorted_terms[:20] if count >= 1]
+        extracted = [term for term, count in term_freq.most_common(20) if count >= 1]
         
         # Also check for common keywords
-        jd_lower = job_description.lower()
-        found_common = [kw for kw in common_keywords if kw in jd_lower]
+        found_common = [kw for kw in _COMMON_KEYWORDS if kw in jd_lower]
         
         # Combine and deduplicate
         all_keywords = list(set(extracted + found_common))
         return all_keywords[:25]
     except Exception as e:
         # Fallback: return common keywords if found
-        jd_lower = job_description.lower()
-        return [kw for kw in common_keywords if kw in jd_lower][:15]
+        return [kw for kw in _COMMON_KEYWORDS if kw in jd_lower][:15]
 
 
 
@@ -194,18 +258,18 @@ def merge_keywords(resume_text: str, keywords: list) -> str:
 # ======================================================
 # AI / NLP Logic - Enhanced Summaries & STAR Format
 # ======================================================
-def enhance_resume(resume_text: str, job_description: str = "") -> str:
-    """Generate enhanced professional summary using Pure Python"""
-    resume_text = " ".join(resume_text.split())
-
-    if not resume_text:
+@st.cache_data(show_spinner=False, max_entries=32)
+def enhance_resume(resume_text: str, job_description: str = "", ats_keywords: list = None) -> str:
+    """Generate enhanced professional summary using Pure Python; pass ats_keywords if already extracted"""
+    if not resume_text.strip():
         return (
             "Motivated student seeking opportunities to apply skills, "
             "gain professional experience, and contribute effectively to organizational goals."
         )
 
-    # Extract top keywords using pure Python
-    tokens = tokenize(resume_text)
+    # Extract top keywords using pure Python. Whitespace does not affect tokens, so tokenize the
+    # lowercased raw text: extract_keywords looks up the same cache entry for the resume
+    tokens = tokenize(resume_text.lower(), lowercase=False)
     term_freq = Counter(tokens)
     top_keywords = [word for word, count in term_freq.most_common(8)]
 
@@ -214,8 +278,11 @@ def enhance_resume(resume_text: str, job_description: str = "") -> str:
 
     # Incorporate ATS keywords if job description provided
     if job_description:
-        ats_keywords = extract_keywords(job_description)
-        relevant_ats = [kw for kw in ats_keywords[:5] if kw not in ' '.join(top_keywords).lower()]
+        if ats_keywords is None:
+            ats_keywords = extract_keywords(job_description)
+        # Tokens are already lowercase, so join them once rather than per keyword
+        covered = ' '.join(top_keywords)
+        relevant_ats = [kw for kw in ats_keywords[:5] if kw not in covered]
         if relevant_ats:
             top_keywords = top_keywords[:5] + relevant_ats[:3]
 
@@ -229,21 +296,21 @@ def enhance_resume(resume_text: str, job_description: str = "") -> str:
     return summary
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
 def generate_star_bullets(experience_text: str, job_keywords: list = None) -> list:
     """Generate STAR-format bullet points from experience"""
     if not experience_text:
         return []
-    
-    # Extract action verbs and achievements
-    action_verbs = ['developed', 'implemented', 'designed', 'created', 'managed', 'led', 
-                   'improved', 'optimized', 'achieved', 'increased', 'reduced', 'delivered']
-    
-    sentences = re.split(r'[.!?]\s+', experience_text)
+
+    # Lowercase once up front; capitalize() below lowercases the rest of each sentence anyway
+    text_lower = experience_text.lower()
     bullets = []
-    
-    for sentence in sentences[:5]:  # Limit to 5 bullets
+
+    # Only the first 5 sentences are considered; maxsplit stops splitting after them
+    for sentence in _SENT_SPLIT_RE.split(text_lower, 5)[:5]:
         sentence = sentence.strip()
-        if len(sentence) > 20 and any(verb in sentence.lower() for verb in action_verbs):
+        # Match whole words so e.g. "scheduled" does not count as "led"
+        if len(sentence) > 20 and not _ACTION_VERBS.isdisjoint(_LETTERS_RE.findall(sentence)):
             # Format as STAR bullet
             bullet = f"• {sentence.capitalize()}"
             if not bullet.endswith('.'):
@@ -261,8 +328,9 @@ def generate_star_bullets(experience_text: str, job_keywords: list = None) -> li
     return bullets[:5]
 
 
-def generate_cover_letter(name: str, job_description: str, resume_text: str) -> str:
-    """Generate a cover letter based on resume and job description"""
+@st.cache_data(show_spinner=False, max_entries=32)
+def generate_cover_letter(name: str, job_description: str, resume_text: str, keywords: list = None) -> str:
+    """Generate a cover letter based on resume and job description; pass keywords if already extracted"""
     if not job_description:
         return (
             f"Dear Hiring Manager,\n\n"
@@ -273,7 +341,8 @@ def generate_cover_letter(name: str, job_description: str, resume_text: str) ->
         )
     
     # Extract key requirements from job description
-    keywords = extract_keywords(job_description)
+    if keywords is None:
+        keywords = extract_keywords(job_description)
     skills_mentioned = ', '.join(keywords[:5]) if keywords else 'relevant skills'
     
     cover_letter = f"""Dear Hiring Manager,
@@ -296,32 +365,36 @@ Sincerely,
 # ======================================================
 # PDF Generator with Templates
 # ======================================================
+# Chained str.replace beats str.translate here: translate drops to a per-character
+# dict lookup for tables with '' or multi-character values, while replace is a C
+# fast search that returns the same object when the character is absent
+_PDF_REPLACEMENTS = (
+    ('\uf10b', ''),
+    ('\u2013', '-'),
+    ('\u2014', '--'),
+    ('\u2018', "'"),
+    ('\u2019', "'"),
+    ('\u201c', '"'),
+    ('\u201d', '"'),
+    ('\u2026', '...'),
+)
+
+
 def sanitize_text_for_pdf(text: str) -> str:
     """Remove or replace Unicode characters that can't be encoded in latin-1"""
     if not text:
         return ""
-    replacements = {
-        '\uf10b': '',
-        '\u2013': '-',
-        '\u2014': '--',
-        '\u2018': "'",
-        '\u2019': "'",
-        '\u201c': '"',
-        '\u201d': '"',
-        '\u2026': '...',
-    }
-    result = text
-    for unicode_char, replacement in replacements.items():
-        result = result.replace(unicode_char, replacement)
-    try:
-        result.encode('latin-1')
-        return result
-    except UnicodeEncodeError:
-        return result.encode('ascii', 'ignore').decode('ascii')
+    if text.isascii():
+        return text
+    for unicode_char, replacement in _PDF_REPLACEMENTS:
+        text = text.replace(unicode_char, replacement)
+    return text.encode('latin-1', 'ignore').decode('latin-1')
 
 
-def create_pdf_resume(name, email, summary, resume_text, template="modern", star_bullets=None) -> str:
-    """Create PDF resume with different templates"""
+def create_pdf_resume(name, email, summary, resume_text, template="modern", star_bullets=None) -> bytes:
+    """Create PDF resume with different templates and return the document bytes"""
+    from fpdf import FPDF
+    
     pdf = FPDF()
     pdf.add_page()
     pdf.set_auto_page_break(auto=True, margin=15)
@@ -329,7 +402,8 @@ def create_pdf_resume(name, email, summary, resume_text, template="modern", star
     safe_name = sanitize_text_for_pdf(name) if name else "Candidate Name"
     safe_email = sanitize_text_for_pdf(email) if email else "email@example.com"
     safe_summary = sanitize_text_for_pdf(summary) if summary else ""
-    safe_text = sanitize_text_for_pdf(resume_text.strip() if resume_text else "")
+    # Cap the body before sanitizing so the discarded tail is never sanitized
+    safe_text = sanitize_text_for_pdf(resume_text.strip()[:5000] if resume_text else "")
 
     if template == "modern":
         pdf.set_font("Arial", "B", 18)
@@ -346,8 +420,9 @@ def create_pdf_resume(name, email, summary, resume_text, template="modern", star
             pdf.set_font("Arial", "B", 14)
             pdf.cell(0, 10, "Key Achievements", ln=True)
             pdf.set_font("Arial", size=10)
-            for bullet in star_bullets[:5]:
-                pdf.multi_cell(0, 5, sanitize_text_for_pdf(bullet))
+            # One multi_cell for all bullets: a single line-break pass, and the
+            # cursor is not left at the right margin between bullets
+            pdf.multi_cell(0, 5, sanitize_text_for_pdf("\n".join(star_bullets[:5])))
     else:
         pdf.set_font("Times", "B", 16)
         pdf.cell(0, 10, safe_name, ln=True)
@@ -363,22 +438,20 @@ def create_pdf_resume(name, email, summary, resume_text, template="modern", star
     pdf.set_font("Arial", "B", 14)
     pdf.cell(0, 10, "Experience & Skills", ln=True)
     pdf.set_font("Arial", size=10)
-    if len(safe_text) > 5000:
-        safe_text = safe_text[:5000]
     pdf.multi_cell(0, 5, safe_text)
 
-    output_file = f"Resume_{template.capitalize()}.pdf"
-    pdf.output(output_file)
-    return output_file
+    return bytes(pdf.output())
 
 
 # ======================================================
 # DOCX Generator
 # ======================================================
-def create_docx_resume(name, email, summary, resume_text, template="modern", star_bullets=None) -> str:
-    """Create DOCX resume"""
-    if not HAS_DOCX:
+def create_docx_resume(name, email, summary, resume_text, template="modern", star_bullets=None) -> bytes:
+    """Create DOCX resume and return the document bytes"""
+    if _load_docx() is None:
         return None
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
     
     doc = Document()
     
@@ -407,38 +480,52 @@ def create_docx_resume(name, email, summary, resume_text, template="modern", sta
         safe_text = safe_text[:5000]
     doc.add_paragraph(safe_text)
     
-    output_file = f"Resume_{template.capitalize()}.docx"
-    doc.save(output_file)
-    return output_file
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def create_resume_documents(name, email, summary, resume_text, template, star_bullets, export_format) -> tuple:
+    """Create only the PDF and/or DOCX resume that the export format asks for"""
+    want_pdf = export_format in ["PDF", "BOTH"]
+    want_docx = export_format in ["DOCX", "BOTH"] and _load_docx() is not None
+    args = (name, email, summary, resume_text, template, star_bullets)
+
+    pdf_bytes = create_pdf_resume(*args) if want_pdf else None
+    docx_bytes = create_docx_resume(*args) if want_docx else None
+    return pdf_bytes, docx_bytes
 
 
 # ======================================================
 # Portfolio ZIP Generator
 # ======================================================
-def create_portfolio_zip(name, email, summary, resume_text, cover_letter, pdf_path=None, docx_path=None) -> str:
-    """Create a ZIP file containing portfolio documents"""
+def create_portfolio_zip(name, email, summary, resume_text, cover_letter, pdf_bytes=None, docx_bytes=None) -> tuple:
+    """Build the portfolio ZIP in memory and return (bytes, filename)"""
     zip_filename = f"Portfolio_{name.replace(' ', '_') if name else 'Candidate'}_{datetime.now().strftime('%Y%m%d')}.zip"
-    
-    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        if pdf_path:
-            zipf.write(pdf_path, f"Resume_{name.replace(' ', '_') if name else 'Resume'}.pdf")
-        if docx_path:
-            zipf.write(docx_path, f"Resume_{name.replace(' ', '_') if name else 'Resume'}.docx")
+    buffer = BytesIO()
+    
+    # Stored by default: PDF and DOCX payloads are already deflate-compressed
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zipf:
+        if pdf_bytes:
+            zipf.writestr(f"Resume_{name.replace(' ', '_') if name else 'Resume'}.pdf", pdf_bytes)
+        if docx_bytes:
+            zipf.writestr(f"Resume_{name.replace(' ', '_') if name else 'Resume'}.docx", docx_bytes)
+        # Plain-text members still shrink well, so deflate them individually
         if cover_letter:
-            zipf.writestr("Cover_Letter.txt", cover_letter)
+            zipf.writestr("Cover_Letter.txt", cover_letter, compress_type=zipfile.ZIP_DEFLATED, compresslevel=9)
         if summary:
-            zipf.writestr("Professional_Summary.txt", summary)
+            zipf.writestr("Professional_Summary.txt", summary, compress_type=zipfile.ZIP_DEFLATED, compresslevel=9)
         if resume_text:
-            zipf.writestr("Resume_Content.txt", resume_text)
+            zipf.writestr("Resume_Content.txt", resume_text, compress_type=zipfile.ZIP_DEFLATED, compresslevel=9)
     
-    return zip_filename
+    return buffer.getvalue(), zip_filename
 
 
 # ======================================================
 # JSON Profile Management
 # ======================================================
-def save_profile_to_json(name, email, resume_text, job_description="", summary="", cover_letter="") -> str:
-    """Save profile data to JSON file"""
+def save_profile_to_json(name, email, resume_text, job_description="", summary="", cover_letter="") -> tuple:
+    """Serialize profile data to JSON and return (bytes, filename)"""
     profile = {
         "name": name,
         "email": email,
@@ -450,10 +537,63 @@ def save_profile_to_json(name, email, resume_text, job_description="", summary="
     }
     
     filename = f"profile_{name.replace(' ', '_') if name else 'candidate'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(profile, f, indent=2, ensure_ascii=False)
+    return json.dumps(profile, indent=2, ensure_ascii=False).encode('utf-8'), filename
+
+
+# ======================================================
+# Results & Downloads
+# ======================================================
+def build_results(name, email, summary, resume_text, job_description, cover_letter, star_bullets, template, export_format) -> dict:
+    """Generate every downloadable artifact once and bundle it with the text results"""
+    pdf_bytes, docx_bytes = create_resume_documents(name, email, summary, resume_text, template, star_bullets, export_format)
+    zip_bytes, zip_filename = create_portfolio_zip(name, email, summary, resume_text, cover_letter, pdf_bytes, docx_bytes)
+    json_bytes, json_filename = save_profile_to_json(name, email, resume_text, job_description, summary, cover_letter)
+    
+    return {
+        "summary": summary,
+        "star_bullets": star_bullets,
+        "cover_letter": cover_letter,
+        "template": template,
+        "pdf": pdf_bytes,
+        "docx": docx_bytes,
+        "zip": (zip_bytes, zip_filename),
+        "json": (json_bytes, json_filename),
+    }
+
+
+def render_results(results, summary_title, cover_letter_title, key):
+    """Show generated content and download buttons from stored results"""
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader(summary_title)
+        st.write(results["summary"])
+        
+        if results["star_bullets"]:
+            st.subheader("STAR-Format Achievements")
+            for bullet in results["star_bullets"]:
+                st.write(bullet)
+    
+    with col2:
+        st.subheader(cover_letter_title)
+        st.text_area(cover_letter_title, results["cover_letter"], height=300, disabled=True, label_visibility="collapsed", key=f"cl_display{key}")
     
-    return filename
+    # Download buttons
+    st.subheader("📥 Downloads")
+    col1, col2, col3, col4 = st.columns(4)
+    template = results["template"].capitalize()
+    
+    if results["pdf"]:
+        col1.download_button("⬇️ Download PDF", data=results["pdf"], file_name=f"Resume_{template}.pdf", mime="application/pdf", key=f"dl_pdf{key}")
+    
+    if results["docx"]:
+        col2.download_button("⬇️ Download DOCX", data=results["docx"], file_name=f"Resume_{template}.docx", mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document", key=f"dl_docx{key}")
+    
+    zip_bytes, zip_filename = results["zip"]
+    col3.download_button("⬇️ Download Portfolio ZIP", data=zip_bytes, file_name=zip_filename, mime="application/zip", key=f"dl_zip{key}")
+    
+    json_bytes, json_filename = results["json"]
+    col4.download_button("⬇️ Download Profile JSON", data=json_bytes, file_name=json_filename, mime="application/json", key=f"dl_json{key}")
 
 
 # ======================================================
@@ -477,19 +617,25 @@ st.info(
 with st.sidebar:
     st.header("⚙️ Options")
     template_choice = st.selectbox("Choose Template", ["modern", "classic", "professional"])
-    export_options = ["PDF"] + (["DOCX", "BOTH"] if HAS_DOCX else [])
+    export_options = ["PDF"] + (["DOCX", "BOTH"] if _load_docx() is not None else [])
     export_format = st.selectbox("Export Format", export_options)
     
     st.header("💾 Profile Management")
     load_profile = st.file_uploader("Load Profile JSON", type=["json"])
 
-# Main content area
-tab1, tab2, tab3 = st.tabs(["📄 Upload Resume", "✍️ Create New", "📋 Load Profile"])
+# Main content area: only the selected mode is rendered on each rerun, unlike st.tabs
+mode = st.radio("Mode", ["📄 Upload Resume", "✍️ Create New", "📋 Load Profile"], horizontal=True, label_visibility="collapsed")
+
+# Streamlit drops the state of widgets that are not rendered, so re-assign the
+# form fields to keep what the user typed when they switch modes and come back
+for field_key in ("name1", "email1", "jd1", "name2", "email2", "skills2", "projects2", "jd2"):
+    if field_key in st.session_state:
+        st.session_state[field_key] = st.session_state[field_key]
 
 profile_data = {}
 
 # Tab 1: Upload Existing Resume
-with tab1:
+if mode == "📄 Upload Resume":
     st.subheader("Upload Existing Resume (PDF)")
     uploaded_file = st.file_uploader("Upload your resume (PDF only)", type=["pdf"], key="upload_pdf")
     name = st.text_input("Your Name", key="name1")
@@ -501,21 +647,33 @@ with tab1:
             st.error("Please upload a PDF resume.")
         else:
             with st.spinner("Processing resume..."):
-                resume_text = extract_text_from_pdf(uploaded_file)
-                
-                # ATS keyword extraction
+                # Keep the parsed text per session, keyed by a digest of the upload, so
+                # re-enhancing the same file skips the cached extractor's hash-and-copy too
+                pdf_data = uploaded_file.getvalue()
+                pdf_key = hashlib.blake2b(pdf_data, digest_size=8).hexdigest()
+                if st.session_state.get('pdf_key') != pdf_key:
+                    st.session_state['pdf_text'] = extract_text_from_pdf(pdf_data)
+                    st.session_state['pdf_key'] = pdf_key
+                resume_text, page_count = st.session_state['pdf_text']
+                if is_image_only_pdf(resume_text, page_count):
+                    st.warning(
+                        "This PDF appears to be scanned or image-only, so little text could be extracted. "
+                        "Run it through OCR or upload a text-based PDF for better results."
+                    )
+                
+                # ATS keyword extraction (reused by the summary and cover letter below)
                 ats_keywords = extract_keywords(job_description) if job_description else []
                 if ats_keywords:
                     resume_text = merge_keywords(resume_text, ats_keywords)
                 
                 # Generate enhanced summary
-                enhanced_summary = enhance_resume(resume_text, job_description)
+                enhanced_summary = enhance_resume(resume_text, job_description, ats_keywords)
                 
                 # Generate STAR bullets
                 star_bullets = generate_star_bullets(resume_text, ats_keywords)
                 
                 # Generate cover letter
-                cover_letter = generate_cover_letter(name, job_description, resume_text)
+                cover_letter = generate_cover_letter(name, job_description, resume_text, ats_keywords)
                 
                 # Store in session state
                 profile_data = {
@@ -529,60 +687,15 @@ with tab1:
                 }
                 st.session_state['profile_data'] = profile_data
                 
+                st.session_state['results1'] = build_results(name, email, enhanced_summary, resume_text, job_description, cover_letter, star_bullets, template_choice, export_format)
                 st.success("Resume processed successfully!")
-                
-                # Display results
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.subheader("AI-Enhanced Professional Summary")
-                    st.write(enhanced_summary)
-                    
-                    if star_bullets:
-                        st.subheader("STAR-Format Achievements")
-                        for bullet in star_bullets:
-                            st.write(bullet)
-                
-                with col2:
-                    st.subheader("Generated Cover Letter")
-                    st.text_area("", cover_letter, height=300, key="cl_display1")
-                
-                # Generate files
-                pdf_path = None
-                docx_path = None
-                
-                if export_format in ["PDF", "BOTH"]:
-                    pdf_path = create_pdf_resume(name, email, enhanced_summary, resume_text, template_choice, star_bullets)
-                
-                if export_format in ["DOCX", "BOTH"] and HAS_DOCX:
-                    docx_path = create_docx_resume(name, email, enhanced_summary, resume_text, template_choice, star_bullets)
-                
-                # Create portfolio ZIP
-                portfolio_zip = create_portfolio_zip(name, email, enhanced_summary, resume_text, cover_letter, pdf_path, docx_path)
-                
-                # Save profile JSON
-                profile_json = save_profile_to_json(name, email, resume_text, job_description, enhanced_summary, cover_letter)
-                
-                # Download buttons
-                st.subheader("📥 Downloads")
-                col1, col2, col3, col4 = st.columns(4)
-                
-                if pdf_path:
-                    with open(pdf_path, "rb") as f:
-                        col1.download_button("⬇️ Download PDF", data=f, file_name=pdf_path, mime="application/pdf")
-                
-                if docx_path:
-                    with open(docx_path, "rb") as f:
-                        col2.download_button("⬇️ Download DOCX", data=f, file_name=docx_path, mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
-                
-                with open(portfolio_zip, "rb") as f:
-                    col3.download_button("⬇️ Download Portfolio ZIP", data=f, file_name=portfolio_zip, mime="application/zip")
-                
-                with open(profile_json, "rb") as f:
-                    col4.download_button("⬇️ Download Profile JSON", data=f, file_name=profile_json, mime="application/json")
+    
+    # Rendered from session state so download-click reruns reuse the generated bytes
+    if 'results1' in st.session_state:
+        render_results(st.session_state['results1'], "AI-Enhanced Professional Summary", "Generated Cover Letter", 1)
 
 # Tab 2: Create New Resume
-with tab2:
+elif mode == "✍️ Create New":
     st.subheader("Create New Resume")
     name2 = st.text_input("Full Name", key="name2")
     email2 = st.text_input("Email Address", key="email2")
@@ -597,17 +710,17 @@ with tab2:
             st.error("Please enter skills and/or projects.")
         else:
             with st.spinner("Generating resume..."):
-                # ATS keyword extraction
+                # ATS keyword extraction (reused by the summary and cover letter below)
                 ats_keywords = extract_keywords(job_description2) if job_description2 else []
                 
                 # Generate enhanced summary
-                enhanced_summary = enhance_resume(combined_text, job_description2)
+                enhanced_summary = enhance_resume(combined_text, job_description2, ats_keywords)
                 
                 # Generate STAR bullets
                 star_bullets = generate_star_bullets(combined_text, ats_keywords)
                 
                 # Generate cover letter
-                cover_letter = generate_cover_letter(name2, job_description2, combined_text)
+                cover_letter = generate_cover_letter(name2, job_description2, combined_text, ats_keywords)
                 
                 # Store in session state
                 profile_data = {
@@ -621,60 +734,14 @@ with tab2:
                 }
                 st.session_state['profile_data'] = profile_data
                 
+                st.session_state['results2'] = build_results(name2, email2, enhanced_summary, combined_text, job_description2, cover_letter, star_bullets, template_choice, export_format)
                 st.success("Resume generated successfully!")
-                
-                # Display results
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.subheader("Generated Professional Summary")
-                    st.write(enhanced_summary)
-                    
-                    if star_bullets:
-                        st.subheader("STAR-Format Achievements")
-                        for bullet in star_bullets:
-                            st.write(bullet)
-                
-                with col2:
-                    st.subheader("Generated Cover Letter")
-                    st.text_area("", cover_letter, height=300, key="cl_display2")
-                
-                # Generate files
-                pdf_path = None
-                docx_path = None
-                
-                if export_format in ["PDF", "BOTH"]:
-                    pdf_path = create_pdf_resume(name2, email2, enhanced_summary, combined_text, template_choice, star_bullets)
-                
-                if export_format in ["DOCX", "BOTH"] and HAS_DOCX:
-                    docx_path = create_docx_resume(name2, email2, enhanced_summary, combined_text, template_choice, star_bullets)
-                
-                # Create portfolio ZIP
-                portfolio_zip = create_portfolio_zip(name2, email2, enhanced_summary, combined_text, cover_letter, pdf_path, docx_path)
-                
-                # Save profile JSON
-                profile_json = save_profile_to_json(name2, email2, combined_text, job_description2, enhanced_summary, cover_letter)
-                
-                # Download buttons
-                st.subheader("📥 Downloads")
-                col1, col2, col3, col4 = st.columns(4)
-                
-                if pdf_path:
-                    with open(pdf_path, "rb") as f:
-                        col1.download_button("⬇️ Download PDF", data=f, file_name=pdf_path, mime="application/pdf")
-                
-                if docx_path:
-                    with open(docx_path, "rb") as f:
-                        col2.download_button("⬇️ Download DOCX", data=f, file_name=docx_path, mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
-                
-                with open(portfolio_zip, "rb") as f:
-                    col3.download_button("⬇️ Download Portfolio ZIP", data=f, file_name=portfolio_zip, mime="application/zip")
-                
-                with open(profile_json, "rb") as f:
-                    col4.download_button("⬇️ Download Profile JSON", data=f, file_name=profile_json, mime="application/json")
+    
+    if 'results2' in st.session_state:
+        render_results(st.session_state['results2'], "Generated Professional Summary", "Generated Cover Letter", 2)
 
 # Tab 3: Load Profile
-with tab3:
+else:
     st.subheader("Load Saved Profile")
     
     if load_profile:
@@ -690,65 +757,23 @@ with tab3:
             
             if st.button("Regenerate Resume", key="regenerate3"):
                 with st.spinner("Regenerating resume..."):
-                    # ATS keyword extraction
+                    # ATS keyword extraction (reused by the summary and cover letter below)
                     ats_keywords = extract_keywords(job_description3) if job_description3 else []
                     
                     # Generate enhanced summary
-                    enhanced_summary = enhance_resume(resume_text3, job_description3)
+                    enhanced_summary = enhance_resume(resume_text3, job_description3, ats_keywords)
                     
                     # Generate STAR bullets
                     star_bullets = generate_star_bullets(resume_text3, ats_keywords)
                     
                     # Generate cover letter
-                    cover_letter = generate_cover_letter(name3, job_description3, resume_text3)
+                    cover_letter = generate_cover_letter(name3, job_description3, resume_text3, ats_keywords)
                     
+                    st.session_state['results3'] = build_results(name3, email3, enhanced_summary, resume_text3, job_description3, cover_letter, star_bullets, template_choice, export_format)
                     st.success("Resume regenerated!")
-                    
-                    # Display and download options (same as above)
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.subheader("Professional Summary")
-                        st.write(enhanced_summary)
-                        
-                        if star_bullets:
-                            st.subheader("STAR-Format Achievements")
-                            for bullet in star_bullets:
-                                st.write(bullet)
-                    
-                    with col2:
-                        st.subheader("Cover Letter")
-                        st.text_area("", cover_letter, height=300, key="cl_display3")
-                    
-                    # Generate files
-                    pdf_path = None
-                    docx_path = None
-                    
-                    if export_format in ["PDF", "BOTH"]:
-                        pdf_path = create_pdf_resume(name3, email3, enhanced_summary, resume_text3, template_choice, star_bullets)
-                    
-                    if export_format in ["DOCX", "BOTH"] and HAS_DOCX:
-                        docx_path = create_docx_resume(name3, email3, enhanced_summary, resume_text3, template_choice, star_bullets)
-                    
-                    portfolio_zip = create_portfolio_zip(name3, email3, enhanced_summary, resume_text3, cover_letter, pdf_path, docx_path)
-                    profile_json = save_profile_to_json(name3, email3, resume_text3, job_description3, enhanced_summary, cover_letter)
-                    
-                    st.subheader("📥 Downloads")
-                    col1, col2, col3, col4 = st.columns(4)
-                    
-                    if pdf_path:
-                        with open(pdf_path, "rb") as f:
-                            col1.download_button("⬇️ Download PDF", data=f, file_name=pdf_path, mime="application/pdf")
-                    
-                    if docx_path:
-                        with open(docx_path, "rb") as f:
-                            col2.download_button("⬇️ Download DOCX", data=f, file_name=docx_path, mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
-                    
-                    with open(portfolio_zip, "rb") as f:
-                        col3.download_button("⬇️ Download Portfolio ZIP", data=f, file_name=portfolio_zip, mime="application/zip")
-                    
-                    with open(profile_json, "rb") as f:
-                        col4.download_button("⬇️ Download Profile JSON", data=f, file_name=profile_json, mime="application/json")
+            
+            if 'results3' in st.session_state:
+                render_results(st.session_state['results3'], "Professional Summary", "Cover Letter", 3)
         
         except json.JSONDecodeError:
             st.error("Invalid JSON file. Please check the file format.")